@@ -9,13 +9,13 @@ print("--- Dijkstra's Algorithm Paths Computed ---")
 # --- Example Demonstrations ---
 start_example_1, end_example_1 = 1, 40 
 # Path example: 1,2,3,4,10,16,22, 28,34,40 [cite: 147]
-path_1_to_40 = all_paths.get(start_example_1, {}).get(end_example_1)
+path_1_to_40 = all_paths.get_path(start_example_1, end_example_1)
 
 start_example_2, end_example_2 = 1, 15 # Path that needs to route around obstacles 8, 9
-path_1_to_15 = all_paths.get(start_example_2, {}).get(end_example_2)
+path_1_to_15 = all_paths.get_path(start_example_2, end_example_2)
 
 start_example_3, end_example_3 = 28, 42 # Path routed near obstacle 29, 35
-path_28_to_42 = all_paths.get(start_example_3, {}).get(end_example_3)
+path_28_to_42 = all_paths.get_path(start_example_3, end_example_3)
 
 
 print(f"\nExample 1: Path from {start_example_1} to {end_example_1}")
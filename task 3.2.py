@@ -1,6 +1,13 @@
+import collections
+import functools
+from array import array
+
 # Import all utilities
 from warehouse_utils import *
 
+# Number of most recent positions checked for revisits when detecting oscillation
+OSCILLATION_WINDOW = 4
+
 # Define direction mapping for proper boundary following (to keep track of robot's heading)
 # (dr, dc): (change in row, change in col)
 # N: (-1, 0), S: (1, 0), W: (0, -1), E: (0, 1)
@@ -18,57 +25,81 @@ RIGHT_TURN_ORDER = {
     (-1, 0): [(0, 1), (-1, 0), (0, -1), (1, 0)], # N: [E, N, W, S]
 }
 
+# Headings as small ints so the robot can track its direction without tuple hashing
+HEADINGS = [(0, 1), (1, 0), (0, -1), (-1, 0)] # E, S, W, N
+DIR_IDX = {vector: i for i, vector in enumerate(HEADINGS)}
+# TURN_TBL[heading][k] = (new heading, dr, dc) for the k-th entry of RIGHT_TURN_ORDER
+TURN_TBL = tuple(
+    tuple((DIR_IDX[move], move[0], move[1]) for move in RIGHT_TURN_ORDER[vector])
+    for vector in HEADINGS
+)
+
+@functools.lru_cache(maxsize=None)
+def mline_mask(start_pos, goal_pos):
+    """Returns the positions on the straight line (M-Line) from start to goal as a bitmask (bit pos - 1)."""
+    start_r, start_c = to_coords(start_pos)
+    goal_r, goal_c = to_coords(goal_pos)
+    bits = 0
+    r, c = start_r, start_c
+    
+    while r != goal_r or c != goal_c:
+        bits |= 1 << (to_index(r, c) - 1)
+        dr = 1 if goal_r > r else (-1 if goal_r < r else 0)
+        dc = 1 if goal_c > c else (-1 if goal_c < c else 0)
+        
+        if abs(goal_r - r) >= abs(goal_c - c):
+            r += dr
+        else:
+            c += dc
+            
+    bits |= 1 << (goal_pos - 1)
+    return bits
+
 class Bug2Robot:
     def __init__(self, start_pos, goal_pos, precomputed_path, obstacles):
         self.current_pos = start_pos
         self.goal_pos = goal_pos
         self.precomputed_path = precomputed_path
+        self._pos_to_idx = {p: i for i, p in enumerate(precomputed_path)} # Position -> index on the path
+        self._path_rc = [to_coords(p) for p in precomputed_path] # (row, col) of every path position
         self.obstacles = obstacles # Static + Unexpected
+        self.blocked_mask = obstacle_mask(self.obstacles) # Bit (pos - 1) set for every obstacle
         self.path_taken = [start_pos]
+        # Sliding window of the last few positions, used to detect oscillation in O(1)
+        self._recent = collections.deque([start_pos], maxlen=OSCILLATION_WINDOW)
+        self._recent_set = {start_pos}
+        self.oscillating = False # True when the last move revisited a position in the window
         self.state = "MOVE_TO_GOAL"
-        self.m_line = self._calculate_m_line()
+        self.m_line = mline_mask(precomputed_path[0], goal_pos) # Bitmask: bit (pos - 1) set for M-Line positions
         self.hit_point = None
         self.hit_distance = float('inf')
         self.leave_point = None
-        self.current_dir = None # Track robot's last movement vector (dr, dc)
+        self.current_dir = None # Track robot's last movement as a HEADINGS index
         
-    def _calculate_m_line(self):
-        """Calculates the set of positions on the straight line (M-Line) from start to goal."""
-        # ... (Same as before)
-        start_r, start_c = to_coords(self.precomputed_path[0])
-        goal_r, goal_c = to_coords(self.goal_pos)
-        m_line_points = set()
-        r, c = start_r, start_c
+        # Manhattan distance to the goal for every position (entry 0 unused)
+        goal_r, goal_c = COORDS_TBL[goal_pos]
+        self._dist_tbl = array('b', [0] * (TOTAL_POSITIONS + 1))
+        for p in range(1, TOTAL_POSITIONS + 1):
+            r, c = COORDS_TBL[p]
+            self._dist_tbl[p] = abs(goal_r - r) + abs(goal_c - c)
         
-        while r != goal_r or c != goal_c:
-            m_line_points.add(to_index(r, c))
-            dr = 1 if goal_r > r else (-1 if goal_r < r else 0)
-            dc = 1 if goal_c > c else (-1 if goal_c < c else 0)
-            
-            if abs(goal_r - r) >= abs(goal_c - c):
-                r += dr
-            else:
-                c += dc
-                
-        m_line_points.add(self.goal_pos)
-        return m_line_points
-
     def _is_blocked(self, position):
-        """Checks if a position is an obstacle or outside the map boundary."""
-        return position in self.obstacles or position not in range(1, TOTAL_POSITIONS + 1)
+        """Checks if a position is an obstacle or outside the map boundary (None from INDEX_TBL).
+
+        Callers only pass INDEX_TBL lookups or path positions, so any non-None position is on the grid.
+        """
+        return position is None or (self.blocked_mask >> (position - 1)) & 1
 
     def _dist_to_goal(self, pos):
-        """Calculates Manhattan distance to the goal."""
-        r, c = to_coords(pos)
-        goal_r, goal_c = to_coords(self.goal_pos)
-        return abs(goal_r - r) + abs(goal_c - c)
+        """Returns the precomputed Manhattan distance to the goal."""
+        return self._dist_tbl[pos]
 
     def _find_boundary_move(self):
         """
         Implements a consistent right-turn wall-following rule.
         Requires tracking the current direction (self.current_dir).
         """
-        r, c = to_coords(self.current_pos)
+        r, c = COORDS_TBL[self.current_pos]
         
         # Determine the initial direction if just starting FOLLOW_BOUNDARY
         if self.current_dir is None:
@@ -77,21 +108,21 @@ class Bug2Robot:
             # Let's just pick the first non-blocked neighbor in order (E, S, W, N)
             initial_moves = [(0, 1), (1, 0), (0, -1), (-1, 0)]
             for dc, dr in initial_moves:
-                 neighbor_index = to_index(r + dr, c + dc)
-                 if neighbor_index is not None and not self._is_blocked(neighbor_index):
-                    self.current_dir = (dr, dc)
+                 neighbor_index = INDEX_TBL[r + dr + 1][c + dc + 1]
+                 if not self._is_blocked(neighbor_index):
+                    self.current_dir = DIR_IDX[(dr, dc)]
                     return neighbor_index
             return None # Stuck
         
         # Use the stored direction to prioritize moves
-        move_priorities = RIGHT_TURN_ORDER.get(self.current_dir)
+        move_priorities = TURN_TBL[self.current_dir]
         
         # 1. Try to turn Right (first in priority list)
-        for dr, dc in move_priorities:
-            neighbor_index = to_index(r + dr, c + dc)
-            if neighbor_index is not None and not self._is_blocked(neighbor_index):
+        for new_dir, dr, dc in move_priorities:
+            neighbor_index = INDEX_TBL[r + dr + 1][c + dc + 1]
+            if not self._is_blocked(neighbor_index):
                 # The move is clear, update direction and return
-                self.current_dir = (dr, dc)
+                self.current_dir = new_dir
                 return neighbor_index
         
         # Should not be reached if boundary is followable
@@ -99,40 +130,30 @@ class Bug2Robot:
 
     def _get_move_to_goal(self):
         """Gets the next position on the precomputed path."""
-        try:
-            current_index = self.precomputed_path.index(self.current_pos)
+        current_index = self._pos_to_idx.get(self.current_pos, -1)
+        if current_index >= 0:
             if current_index + 1 < len(self.precomputed_path):
                 return self.precomputed_path[current_index + 1]
             else:
                 return None
-        except ValueError:
+        else:
             # This happens if the robot has successfully left the boundary and is now *not* on the original path.
             # We must find the closest forward point on the path and update the index.
             
             # Since the robot has left the boundary at a point closer to the goal, 
             # we should look for the path point closest to the current position.
             
-            min_dist = float('inf')
-            next_path_pos = None
-            
             # Search from the hit point index onward to find the closest path point
             # to transition back to the main route.
-            start_index = self.precomputed_path.index(self.hit_point) if self.hit_point in self.precomputed_path else 0
+            start_index = self._pos_to_idx.get(self.hit_point, 0)
             
-            for i in range(start_index, len(self.precomputed_path)):
-                path_pos = self.precomputed_path[i]
-                r_r, c_r = to_coords(self.current_pos)
-                r_p, c_p = to_coords(path_pos)
-                dist = abs(r_r - r_p) + abs(c_r - c_p) # Manhattan distance
-                
-                if dist < min_dist:
-                    min_dist = dist
-                    next_path_pos = path_pos
-                    self.path_index = i - 1 # Set index to the position *before* the next one we will target
+            r_r, c_r = COORDS_TBL[self.current_pos]
+            dists = [abs(r_r - r_p) + abs(c_r - c_p) for r_p, c_p in self._path_rc[start_index:]] # Manhattan distance
             
-            # If we successfully found a path point, we target the next one
-            if next_path_pos:
-                 return self.precomputed_path[self.path_index + 1]
+            # If we successfully found a path point, we target it (first one at minimum distance)
+            if dists:
+                self.path_index = start_index + dists.index(min(dists)) - 1 # Set index to the position *before* the next one we will target
+                return self.precomputed_path[self.path_index + 1]
 
             return None # Cannot find a path point
 
@@ -165,9 +186,9 @@ class Bug2Robot:
                     return False
             else:
                 # Update direction based on the planned move
-                r_c, c_c = to_coords(self.current_pos)
-                r_n, c_n = to_coords(predicted_next_pos)
-                self.current_dir = (r_n - r_c, c_n - c_c)
+                r_c, c_c = COORDS_TBL[self.current_pos]
+                r_n, c_n = COORDS_TBL[predicted_next_pos]
+                self.current_dir = DIR_IDX.get((r_n - r_c, c_n - c_c))
                 next_pos = predicted_next_pos
             
         elif self.state == "FOLLOW_BOUNDARY":
@@ -183,7 +204,7 @@ class Bug2Robot:
             # Bug2 Leave Condition: Intersect M-Line AND distance to goal is less than at hit_point 
             current_distance_to_goal = self._dist_to_goal(next_pos)
             
-            if next_pos in self.m_line and current_distance_to_goal < self.hit_distance:
+            if (self.m_line >> (next_pos - 1)) & 1 and current_distance_to_goal < self.hit_distance:
                 print(f"Robot intersects M-Line at {next_pos}, which is closer (dist {current_distance_to_goal}) to goal than hit point (dist {self.hit_distance}). Resuming MOVE_TO_GOAL.")
                 self.state = "MOVE_TO_GOAL"
                 self.leave_point = self.current_pos
@@ -195,19 +216,38 @@ class Bug2Robot:
 
         if next_pos and self.state != "FAILURE":
             # Update path index only when moving along the precomputed path
-            if self.state == "MOVE_TO_GOAL" and next_pos in self.precomputed_path:
-                try:
-                    self.path_index = self.precomputed_path.index(next_pos)
-                except ValueError:
-                    # Should not happen after fixing _get_move_to_goal
-                    pass 
+            if self.state == "MOVE_TO_GOAL" and next_pos in self._pos_to_idx:
+                self.path_index = self._pos_to_idx[next_pos]
             
             self.current_pos = next_pos
-            self.path_taken.append(self.current_pos)
+            self._record_move(self.current_pos)
             return False 
         
         return True 
 
+    def _record_move(self, pos):
+        """Appends pos to path_taken and flags whether it revisits a recently visited position."""
+        self.oscillating = pos in self._recent_set
+        if len(self._recent) == self._recent.maxlen:
+            evicted = self._recent.popleft()
+            if evicted not in self._recent:
+                self._recent_set.discard(evicted)
+        self._recent.append(pos)
+        self._recent_set.add(pos)
+        self.path_taken.append(pos)
+
+    def run(self, max_steps, stop_on_oscillation=False):
+        """Steps the robot until step() reports completion or max_steps is reached; returns the step count."""
+        step = self.step
+        steps = 0
+        while not step() and steps < max_steps:
+            # Prevent infinite loop by manually breaking if oscillation is detected
+            if stop_on_oscillation and steps > 10 and self.oscillating:
+                print("Detected oscillation. Stopping.")
+                break
+            steps += 1
+        return steps
+
 # --- Setup for Simulation ---
 # Re-compute paths needed for this task's examples
 all_paths = compute_all_shortest_paths()
@@ -217,20 +257,13 @@ print("\n=== Bug2 Case 1: Successful Circumnavigation (Obstacle at 22) ===")
 START_1, GOAL_1 = 1, 40
 UNEXPECTED_OBSTACLE_1 = {22} # Put an obstacle at a known point on the path [cite: 157]
 FULL_OBSTACLES_1 = STATIC_OBSTACLES.union(UNEXPECTED_OBSTACLE_1)
-PATH_1 = all_paths.get(START_1, {}).get(GOAL_1) 
+PATH_1 = all_paths.get_path(START_1, GOAL_1) 
 # Precomputed path: [1, 2, 3, 4, 10, 16, 22, 28, 34, 40]
 
 if PATH_1:
     robot_1 = Bug2Robot(START_1, GOAL_1, PATH_1, FULL_OBSTACLES_1)
     
-    steps = 0
-    max_steps = 100
-    while not robot_1.step() and steps < max_steps:
-        # Prevent infinite loop by manually breaking if oscillation is detected
-        if steps > 10 and len(robot_1.path_taken) > 10 and robot_1.path_taken[-1] == robot_1.path_taken[-3]:
-            print("Detected oscillation. Stopping.")
-            break
-        steps += 1
+    robot_1.run(max_steps=100, stop_on_oscillation=True)
 
     print(f"\nSimulation Result (Case 1): {'Success' if robot_1.current_pos == GOAL_1 else 'Failure'}")
     print(f"Final Path Taken: {robot_1.path_taken}")
@@ -243,15 +276,12 @@ print("\n=== Bug2 Case 2: Blocked Path (Obstacle at 39, surrounded) ===")
 START_2, GOAL_2 = 36, 42
 UNEXPECTED_OBSTACLE_2 = {39, 40} # Blocking the narrow path to 42
 FULL_OBSTACLES_2 = STATIC_OBSTACLES.union(UNEXPECTED_OBSTACLE_2)
-PATH_2 = all_paths.get(START_2, {}).get(GOAL_2)
+PATH_2 = all_paths.get_path(START_2, GOAL_2)
 
 if PATH_2:
     robot_2 = Bug2Robot(START_2, GOAL_2, PATH_2, FULL_OBSTACLES_2)
     
-    steps = 0
-    max_steps = 100
-    while not robot_2.step() and steps < max_steps:
-        steps += 1
+    robot_2.run(max_steps=100)
 
     print(f"\nSimulation Result (Case 2): {'Success' if robot_2.current_pos == GOAL_2 else 'Failure'}")
     print(f"Final Path Taken: {robot_2.path_taken}")
@@ -10,12 +10,10 @@ class CoordinatedRobot:
         self.current_pos = start_pos
         self.goal_pos = goal_pos
         self.path_plan = path_plan
+        self._pos_to_idx = {p: i for i, p in enumerate(path_plan)} # Position -> index on the plan
         self.path_taken = [start_pos]
         
-        try:
-            self.path_index = path_plan.index(start_pos)
-        except ValueError:
-            self.path_index = 0
+        self.path_index = self._pos_to_idx.get(start_pos, 0)
             
         self.state = "MOVE" # MOVE, HOLDING, RESUMING_PATH
         self.conflict_pos = None
@@ -87,7 +85,7 @@ class CoordinatedRobot:
             
             # The critical segment is R1's next spot (conflict_pos) and the spot after that (R2's next spot).
             # We assume R2 has cleared the path if its current index is beyond the conflict spot index.
-            conflict_index = self.path_plan.index(self.conflict_pos)
+            conflict_index = self._pos_to_idx[self.conflict_pos]
             
             # Note: R2's path index advances faster because it is the priority robot.
             if other_robot.path_index >= conflict_index:
@@ -121,8 +119,8 @@ all_paths = compute_all_shortest_paths()
 START_1, GOAL_1 = 4, 41
 START_2, GOAL_2 = 41, 4
 
-PATH_R1 = all_paths.get(START_1, {}).get(GOAL_1)
-PATH_R2 = all_paths.get(START_2, {}).get(GOAL_2) 
+PATH_R1 = all_paths.get_path(START_1, GOAL_1)
+PATH_R2 = all_paths.get_path(START_2, GOAL_2) 
 
 if not PATH_R1 or not PATH_R2:
     print("Error: Could not retrieve shortest paths from utilities.")
@@ -1,5 +1,5 @@
-import heapq
 import math
+from array import array
 
 # --- Grid Definitions ---
 NUM_ROWS = 7
@@ -10,8 +10,40 @@ TOTAL_POSITIONS = NUM_ROWS * NUM_COLS
 # Positions 8, 9, 29, 35 are occupied
 STATIC_OBSTACLES = {8, 9, 29, 35}
 
+# Pack a set of 1-based positions into a bitmask (bit pos - 1 set for each position)
+def obstacle_mask(obstacles):
+    """Returns the bitmask of the given 1-based positions."""
+    mask = 0
+    for p in obstacles:
+        mask |= 1 << (p - 1)
+    return mask
+
+STATIC_BLOCKED_MASK = obstacle_mask(STATIC_OBSTACLES)
+
 # Generate a list of all valid positions (not obstacles)
 FREE_POSITIONS = [i for i in range(1, TOTAL_POSITIONS + 1) if i not in STATIC_OBSTACLES]
+NUM_FREE = len(FREE_POSITIONS)
+
+# 0-based free-position id of every free position (row/column of the path tables)
+FREE_INDEX = {pos: i for i, pos in enumerate(FREE_POSITIONS)}
+
+# Sentinels for the int16 distance / predecessor tables
+UNREACHABLE = 32767
+NO_PREDECESSOR = -1
+
+# --- Lookup Tables ---
+
+# (row, col) of every 1-based position; entry 0 is unused
+COORDS_TBL = (None,) + tuple(divmod(i, NUM_COLS) for i in range(TOTAL_POSITIONS))
+
+# 1-based position of every (row, col), padded by one row/column of None on each side:
+# INDEX_TBL[r + 1][c + 1] is valid for -1 <= r <= NUM_ROWS and -1 <= c <= NUM_COLS,
+# which covers any single right-angle step from a grid cell
+INDEX_TBL = tuple(
+    tuple(r * NUM_COLS + c + 1 if 0 <= r < NUM_ROWS and 0 <= c < NUM_COLS else None
+          for c in range(-1, NUM_COLS + 1))
+    for r in range(-1, NUM_ROWS + 1)
+)
 
 # --- Helper Functions ---
 
@@ -19,22 +51,20 @@ FREE_POSITIONS = [i for i in range(1, TOTAL_POSITIONS + 1) if i not in STATIC_OB
 def to_index(r, c):
     """Converts 0-based coordinates (row, col) to a 1-based position index."""
     if 0 <= r < NUM_ROWS and 0 <= c < NUM_COLS:
-        return r * NUM_COLS + c + 1
+        return INDEX_TBL[r + 1][c + 1]
     return None
 
 # Convert 1-based position index to (row, col)
 def to_coords(index):
     """Converts a 1-based position index to 0-based coordinates (row, col)."""
     if 1 <= index <= TOTAL_POSITIONS:
-        zero_based_index = index - 1
-        r = zero_based_index // NUM_COLS
-        c = zero_based_index % NUM_COLS
-        return r, c
+        return COORDS_TBL[index]
     return None
 
 # Function to get neighbors (valid, non-obstacle, right-angle moves)
 def get_neighbors(position, obstacles=STATIC_OBSTACLES):
     """Returns a list of valid, non-obstacle, neighboring positions."""
+    blocked_mask = STATIC_BLOCKED_MASK if obstacles is STATIC_OBSTACLES else obstacle_mask(obstacles)
     r, c = to_coords(position)
     neighbors = []
     
@@ -47,61 +77,120 @@ def get_neighbors(position, obstacles=STATIC_OBSTACLES):
     ]
     
     for next_r, next_c in potential_moves:
-        neighbor_index = to_index(next_r, next_c)
-        if neighbor_index is not None and neighbor_index not in obstacles:
+        neighbor_index = INDEX_TBL[next_r + 1][next_c + 1]
+        if neighbor_index is not None and not (blocked_mask >> (neighbor_index - 1)) & 1:
             neighbors.append(neighbor_index)
             
     return neighbors
 
-# Dijkstra's Algorithm implementation to find predecessors for shortest path
-def dijkstra_shortest_paths(start_node, free_positions=FREE_POSITIONS):
-    """Implements Dijkstra's algorithm to find shortest path predecessors."""
-    distances = {node: float('inf') for node in free_positions}
-    distances[start_node] = 0
-    predecessors = {node: None for node in free_positions}
-    priority_queue = [(0, start_node)] # (distance, node)
+# Precomputed neighbors of every position w.r.t. the static obstacles, indexed by
+# 1-based position (entry 0 and obstacle entries are empty). get_neighbors remains
+# the slow path for callers with dynamic obstacles.
+NEIGHBORS_STATIC = [()] * (TOTAL_POSITIONS + 1)
+for _pos in FREE_POSITIONS:
+    NEIGHBORS_STATIC[_pos] = tuple(get_neighbors(_pos, STATIC_OBSTACLES))
+del _pos
+
+# Static adjacency of the free grid in free-position id space: ADJ_LIST[i] holds the
+# ids of the neighbors of free position i
+ADJ_LIST = [
+    tuple(FREE_INDEX[n] for n in NEIGHBORS_STATIC[pos])
+    for pos in FREE_POSITIONS
+]
+
+# Breadth-first search over the static adjacency (the grid is unweighted)
+def bfs_single_source(src, adjacency, dist_out, pred_out):
+    """Single-source BFS from free-position id `src`, writing into the dist_out / pred_out rows.
+
+    Every move has weight 1, so a cell's first visit is along a shortest path. Each
+    level is expanded lowest id first, so every cell's predecessor is the lowest-id
+    neighbor one step closer to `src` (the same tie-breaking as Dijkstra with a
+    (distance, id) heap). dist_out and pred_out must be pre-filled with
+    UNREACHABLE / NO_PREDECESSOR.
+    """
+    dist_out[src] = 0
+    frontier = [src]
+    distance = 0
     
-    while priority_queue:
-        current_distance, current_node = heapq.heappop(priority_queue)
-        
-        if current_distance > distances[current_node]:
-            continue
-            
-        for neighbor in get_neighbors(current_node, STATIC_OBSTACLES):
-            weight = 1 
-            distance = current_distance + weight
-            
-            if distance < distances[neighbor]:
-                distances[neighbor] = distance
-                predecessors[neighbor] = current_node
-                heapq.heappush(priority_queue, (distance, neighbor))
-                
-    return predecessors
-
-# Reconstruct the path from predecessors map
-def reconstruct_path(start_node, end_node, predecessors):
-    """Reconstructs the path from a predecessors dictionary."""
-    path = []
-    current = end_node
-    while current is not None:
-        path.append(current)
-        current = predecessors.get(current)
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for current_idx in sorted(frontier):
+            for neighbor_idx in adjacency[current_idx]:
+                if dist_out[neighbor_idx] == UNREACHABLE:
+                    dist_out[neighbor_idx] = distance
+                    pred_out[neighbor_idx] = current_idx
+                    next_frontier.append(neighbor_idx)
+        frontier = next_frontier
+
+# Reconstruct the path from the dense predecessor matrix
+def reconstruct_path(start_idx, end_idx, pred, num_free=NUM_FREE):
+    """Reconstructs the path (as positions) between two free-position ids from a flat predecessor matrix."""
+    row = start_idx * num_free
+    buffer = array('h', [0]) * num_free
+    length = 0
+    current = end_idx
+    while current != NO_PREDECESSOR:
+        buffer[length] = current
+        length += 1
+        current = pred[row + current]
         
-    if path and path[-1] == start_node:
-        return path[::-1] # Reverse to get start -> end
+    if length and buffer[length - 1] == start_idx:
+        return [FREE_POSITIONS[i] for i in reversed(buffer[:length])] # Reverse to get start -> end
     else:
         return []
 
+class ShortestPaths:
+    """Dense all-pairs shortest path table over FREE_POSITIONS.
+
+    `dist` and `pred` are flat row-major int16 arrays of shape (NUM_FREE, NUM_FREE)
+    indexed by free-position id. Path lists are only built on request and memoized,
+    so the returned lists are shared and must not be modified by callers.
+    """
+    def __init__(self, dist, pred):
+        self.dist = dist
+        self.pred = pred
+        self._paths = {} # (start_pos, end_pos) -> reconstructed path
+
+    def get_path(self, start_pos, end_pos):
+        """Returns the shortest path from start_pos to end_pos, or None for an unknown/identical pair."""
+        key = (start_pos, end_pos)
+        path = self._paths.get(key)
+        if path is None:
+            start_idx = FREE_INDEX.get(start_pos)
+            end_idx = FREE_INDEX.get(end_pos)
+            if start_idx is None or end_idx is None or start_idx == end_idx:
+                return None
+            path = self._paths[key] = reconstruct_path(start_idx, end_idx, self.pred)
+        return path
+
+    def __getitem__(self, key):
+        """Returns the shortest path for a (start_pos, end_pos) pair; raises KeyError for an unknown/identical pair."""
+        path = self.get_path(*key)
+        if path is None:
+            raise KeyError(key)
+        return path
+
+# Shortest path table shared by every caller, built on first use
+_ALL_PATHS = None
+
 # Function to compute and store all shortest paths
 def compute_all_shortest_paths():
-    """Computes and stores the shortest path between every pair of free positions."""
-    all_paths = {}
+    """Returns the shortest path table between every pair of free positions (computed once per process)."""
+    global _ALL_PATHS
+    if _ALL_PATHS is None:
+        _ALL_PATHS = _compute_all_shortest_paths()
+    return _ALL_PATHS
+
+def _compute_all_shortest_paths():
+    """Computes the shortest path table between every pair of free positions."""
+    dist = array('h', [UNREACHABLE]) * (NUM_FREE * NUM_FREE)
+    pred = array('h', [NO_PREDECESSOR]) * (NUM_FREE * NUM_FREE)
     
-    for start_pos in FREE_POSITIONS:
-        predecessors = dijkstra_shortest_paths(start_pos)
-        all_paths[start_pos] = {}
-        for end_pos in FREE_POSITIONS:
-            if start_pos != end_pos:
-                path = reconstruct_path(start_pos, end_pos, predecessors)
-                all_paths[start_pos][end_pos] = path
-    return all_paths
\ No newline at end of file
+    # Each BFS writes straight into its row through a memoryview, so no per-source rows are allocated
+    dist_view = memoryview(dist)
+    pred_view = memoryview(pred)
+    for start_idx in range(NUM_FREE):
+        row = start_idx * NUM_FREE
+        bfs_single_source(start_idx, ADJ_LIST, dist_view[row:row + NUM_FREE], pred_view[row:row + NUM_FREE])
+    return ShortestPaths(dist, pred)